@@ -6,15 +6,16 @@ Run: uvicorn demos.test_server:app --reload
 Access: http://127.0.0.1:8000
 """
 
+import asyncio
 import random
-import time
+import threading
 from datetime import datetime
 from typing import List, Optional
 
+import msgspec
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
 
 app = FastAPI(title="Web Scraping Test Server")
 
@@ -29,9 +30,22 @@ request_stats = {
     "start_time": datetime.now()
 }
 
+# `counter += 1` is a separate read and write, so two threads bumping the
+# same counter at once can lose an update, and without the GIL nothing
+# stops that. Our handlers all run on the event loop thread today, but
+# FastAPI runs plain `def` endpoints in a thread pool, so every increment
+# goes through this lock to keep the counts exact either way.
+stats_lock = threading.Lock()
 
-class Article(BaseModel):
-    """Article data model"""
+
+def bump(counters: dict, key: str) -> None:
+    """Add one to a shared counter without losing concurrent updates"""
+    with stats_lock:
+        counters[key] += 1
+
+
+class Article(msgspec.Struct):
+    """Article data model (a C-level struct msgspec can encode straight to JSON)"""
     id: int
     title: str
     author: str
@@ -41,7 +55,7 @@ class Article(BaseModel):
 
 
 # Generate sample articles
-SAMPLE_ARTICLES = [
+SAMPLE_ARTICLES: tuple[Article, ...] = tuple(
     Article(
         id=i,
         title=f"Understanding {'Async' if i % 2 == 0 else 'Threading'} in Python: Part {i}",
@@ -52,16 +66,23 @@ SAMPLE_ARTICLES = [
         tags=random.sample(["python", "async", "gil", "performance", "web", "scraping"], k=3)
     )
     for i in range(1, 101)  # 100 articles
-]
+)
+
+# Index articles by id once, so each page view is a dict lookup
+ARTICLES_BY_ID: dict[int, Article] = {a.id: a for a in SAMPLE_ARTICLES}
+
+# One encoder built up front, so its setup isn't repeated on every response
+json_encoder = msgspec.json.Encoder()
 
 
 @app.middleware("http")
 async def add_stats_middleware(request: Request, call_next):
     """Track request statistics"""
-    request_stats["total_requests"] += 1
+    bump(request_stats, "total_requests")
 
-    # Simulate realistic server processing time
-    time.sleep(random.uniform(0.01, 0.05))
+    # Simulate realistic server processing time without blocking the
+    # event loop, so other requests keep being served in the meantime
+    await asyncio.sleep(random.uniform(0.01, 0.05))
 
     response = await call_next(request)
     return response
@@ -70,7 +91,7 @@ async def add_stats_middleware(request: Request, call_next):
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request, page: int = 1):
     """Homepage with paginated article list"""
-    request_stats["page_views"] += 1
+    bump(request_stats, "page_views")
 
     articles_per_page = 10
     start_idx = (page - 1) * articles_per_page
@@ -94,21 +115,22 @@ async def index(request: Request, page: int = 1):
 @app.get("/article/{article_id}", response_class=HTMLResponse)
 async def article(request: Request, article_id: int):
     """Individual article page"""
-    request_stats["article_views"] += 1
+    bump(request_stats, "article_views")
 
     # Find the article
-    article = next((a for a in SAMPLE_ARTICLES if a.id == article_id), None)
+    article = ARTICLES_BY_ID.get(article_id)
     if not article:
         return HTMLResponse(content="Article not found", status_code=404)
 
     # Increment views
-    article.views += 1
+    with stats_lock:
+        article.views += 1
 
-    # Related articles (3 random articles)
-    related = random.sample(
-        [a for a in SAMPLE_ARTICLES if a.id != article_id],
-        k=min(3, len(SAMPLE_ARTICLES) - 1)
-    )
+    # Related articles (3 random articles). Sampling one spare index means
+    # there are still 3 left after skipping the current article, without
+    # building a filtered copy of the whole list.
+    picks = random.sample(range(len(SAMPLE_ARTICLES)), k=min(4, len(SAMPLE_ARTICLES)))
+    related = [SAMPLE_ARTICLES[i] for i in picks if SAMPLE_ARTICLES[i] is not article][:3]
 
     return templates.TemplateResponse(
         "article.html",
@@ -158,16 +180,21 @@ async def api_stats():
 
 @app.get("/api/articles")
 async def api_articles(page: int = 1, limit: int = 10):
-    """API endpoint for articles list (JSON)"""
+    """API endpoint for articles list (JSON)
+
+    msgspec encodes the article structs to JSON bytes in C, so nothing
+    is copied into dicts or walked again by FastAPI's generic encoder.
+    """
     start_idx = (page - 1) * limit
     end_idx = start_idx + limit
 
-    return {
+    body = json_encoder.encode({
         "page": page,
         "limit": limit,
         "total": len(SAMPLE_ARTICLES),
-        "articles": [a.model_dump() for a in SAMPLE_ARTICLES[start_idx:end_idx]]
-    }
+        "articles": SAMPLE_ARTICLES[start_idx:end_idx]
+    })
+    return Response(content=body, media_type="application/json")
 
 
 if __name__ == "__main__":
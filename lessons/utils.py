@@ -9,10 +9,13 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
-import plotext as plt
+from rich.markup import escape
 
 console = Console()
 
+# Width (in characters) of the longest bar in a chart
+BAR_WIDTH = 40
+
 
 @dataclass
 class BenchmarkResult:
@@ -95,7 +98,7 @@ class StatsTracker:
         console.print(table)
 
     def plot_performance_graph(self):
-        """Display a terminal-based line graph of performance"""
+        """Display terminal bar charts of performance"""
         if len(self.results) < 2:
             return
 
@@ -106,27 +109,8 @@ class StatsTracker:
         durations = [r.duration for r in self.results]
         pages_per_sec = [r.pages_per_second for r in self.results]
 
-        # Duration bar chart
-        plt.clf()
-        plt.title("Execution Time Comparison")
-        plt.bar(names, durations, label="Duration (seconds)")
-        plt.xlabel("Configuration")
-        plt.ylabel("Time (s)")
-        plt.theme("dark")
-        plt.plotsize(80, 15)
-        plt.show()
-        console.print()
-
-        # Throughput bar chart
-        plt.clf()
-        plt.title("Throughput Comparison")
-        plt.bar(names, pages_per_sec, label="Pages/second", color="green")
-        plt.xlabel("Configuration")
-        plt.ylabel("Pages/sec")
-        plt.theme("dark")
-        plt.plotsize(80, 15)
-        plt.show()
-        console.print()
+        _print_bar_chart("Execution Time Comparison", names, durations, "s", "yellow")
+        _print_bar_chart("Throughput Comparison", names, pages_per_sec, " pages/sec", "green")
 
     def display_detailed_stats(self, result: BenchmarkResult):
         """Display detailed statistics for a single result"""
@@ -144,6 +128,17 @@ class StatsTracker:
         console.print(Panel(stats_text.strip(), title="📊 Detailed Statistics", border_style="cyan"))
 
 
+def _print_bar_chart(title: str, labels: List[str], values: List[float], unit: str, style: str):
+    """Print a horizontal bar chart scaled so the largest value fills BAR_WIDTH"""
+    console.print(f"[bold]{title}[/bold]")
+    largest = max(values, default=0)
+    for label, value in zip(labels, values):
+        width = int(BAR_WIDTH * value / largest) if largest > 0 else 0
+        bar = "█" * width
+        console.print(f"{escape(f'{label:15}')} [{style}]{bar}[/{style}] {value:.2f}{unit}")
+    console.print()
+
+
 def display_lesson_header(lesson_number: int, title: str, description: str):
     """Display a beautiful lesson header"""
     header = Text()
@@ -4,117 +4,364 @@
 # 1. Single-threaded async
 # 2. Multi-threaded with GIL
 # 3. Multi-threaded without GIL (python -X gil=0)
+# 4. Single async loop handing parsing to a pool of workers (--parse-pool)
 
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-from queue import Queue, Empty
-from concurrent.futures import ThreadPoolExecutor
+import lxml.html
+import sys
+import threading
+from lxml import etree
+from collections import namedtuple
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from time import perf_counter
 from argparse import ArgumentParser
 
+# uvloop swaps in a faster event loop built on libuv (the engine behind
+# Node.js). It doesn't support Windows, where we keep asyncio's default.
+if sys.platform != "win32":
+    import uvloop
+
+    loop_factory = uvloop.new_event_loop
+else:
+    loop_factory = None
+
 BASE_URL = "https://news.ycombinator.com/news?p={}"
 ITEM_URL = "https://news.ycombinator.com/item?id={}"
 
+# Each event loop works on a few pages at once, and caps how many
+# requests (pages + comment pages) it has in flight at any moment.
+PAGES_IN_FLIGHT = 4
+MAX_CONCURRENT_REQUESTS = 50
+
+# How many bytes of a response we read before feeding them to the parser
+STREAM_CHUNK_SIZE = 16384
+
+# Scraped stories and comments are namedtuples rather than dicts: they
+# take about a third of the memory and are quicker to create, and we
+# build thousands of them.
+Story = namedtuple("Story", "id title link comments", defaults=((),))
+Comment = namedtuple("Comment", "user text")
+
+
+def has_class(name: str) -> str:
+    """Build an XPath test matching one class in a space-separated list."""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
 
-async def fetch(session: aiohttp.ClientSession, url: str) -> str:
+
+class ThreadParsers(threading.local):
+    """An HTML parser and compiled XPath queries for the current thread.
+
+    Each XPath query is compiled once, so calling it skips re-parsing the
+    expression on every page. lxml puts a lock around every parser and
+    compiled query, though, so threads sharing one set would take turns
+    parsing. Subclassing threading.local gives each thread its own set,
+    built the first time that thread parses a page.
+    """
+
+    def __init__(self):
+        # Hacker News serves UTF-8 but doesn't declare it in a <meta> tag,
+        # so we tell lxml up front instead of letting it guess.
+        self.html = lxml.html.HTMLParser(encoding="utf-8")
+        self.story_rows = etree.XPath(f"//tr[{has_class('athing')}]")
+        self.story_title = etree.XPath(
+            f".//span[{has_class('titleline')}]/a[1]"
+        )
+        self.comment_rows = etree.XPath(f"//tr[{has_class('comtr')}]")
+        self.comment_user = etree.XPath(f".//a[{has_class('hnuser')}]")
+        self.comment_text = etree.XPath(f".//*[{has_class('commtext')}]")
+        # Our own copy of what element.text_content() runs: lxml.html
+        # keeps a single shared query for it, which every thread would
+        # have to queue for. smart_strings=False returns plain str.
+        self.text_of = etree.XPath("string()", smart_strings=False)
+
+
+parsers = ThreadParsers()
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Create an HTTP session backed by a keep-alive connection pool.
+
+    Opening a connection (TCP + TLS handshake) costs far more than the
+    request itself, so every fetch on an event loop should reuse the
+    same session. Sessions are tied to the event loop that created them,
+    which is why each thread's loop makes its own.
+    """
+    # Every URL is on the same host, so resolve it once and keep the
+    # answer for the whole run instead of re-resolving every 10 seconds.
+    connector = aiohttp.TCPConnector(
+        limit=100,
+        limit_per_host=30,
+        keepalive_timeout=75,
+        use_dns_cache=True,
+        ttl_dns_cache=600,
+    )
+    timeout = aiohttp.ClientTimeout(total=100)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def fetch(
+    session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, url: str
+) -> bytes:
     """Fetch a single page from the web.
 
     This is an async function that waits for the network response.
     In traditional Python, the GIL is released during this I/O wait,
     allowing other threads to run.
+
+    We return the raw bytes and hand them straight to lxml, which
+    decodes them in C and skips a pure-Python decode step.
+
+    The semaphore limits how many requests are running at once.
     """
-    async with session.get(url, timeout=100) as response:
-        return await response.text()
+    async with semaphore, session.get(url) as response:
+        return await response.read()
 
 
-def parse_stories(html: str) -> list[dict]:
-    """Extract story information from a Hacker News page.
+def has_class_token(row: etree._Element, name: str) -> bool:
+    """Check whether an element's class list includes name."""
+    return name in (row.get("class") or "").split()
 
-    This parsing happens on the CPU and is affected by the GIL.
-    With free-threaded Python, multiple threads can parse simultaneously.
-    """
-    soup = BeautifulSoup(html, "html.parser")
-    stories = []
 
-    for item in soup.select(".athing"):
-        title_tag = item.select_one(".titleline > a")
-        story_id = item.get("id")
+def story_from_row(row: etree._Element) -> Story | None:
+    """Pull one story out of a <tr class="athing"> row, if it is one."""
+    story_id = row.get("id")
+    if not story_id or not has_class_token(row, "athing"):
+        return None
 
-        if title_tag and story_id:
-            title = title_tag.text.strip()
-            link = title_tag["href"].strip()
-            stories.append({"id": story_id, "title": title, "link": link})
+    title_tags = parsers.story_title(row)
+    if not title_tags:
+        return None
 
-    return stories
+    title_tag = title_tags[0]
+    title = parsers.text_of(title_tag).strip()
+    link = title_tag.get("href", "").strip()
+    return Story(story_id, title, link)
 
 
-def parse_comments(html: str) -> list[dict]:
-    """Extract comments from a Hacker News story page.
+def comment_from_row(row: etree._Element) -> Comment | None:
+    """Pull one comment out of a <tr class="comtr"> row, if it is one."""
+    if not has_class_token(row, "comtr"):
+        return None
 
-    Like parse_stories, this CPU-bound parsing benefits from
-    true parallelism in free-threaded Python.
+    user_tags = parsers.comment_user(row)
+    comment_tags = parsers.comment_text(row)
+    if not (user_tags and comment_tags):
+        return None
+
+    user = parsers.text_of(user_tags[0]).strip()
+    pieces = (piece.strip() for piece in comment_tags[0].itertext())
+    text = " ".join(piece for piece in pieces if piece)
+    return Comment(user, text)
+
+
+def parse_stories(html: bytes) -> list[Story]:
+    """Extract story information from a Hacker News page.
+
+    This parsing happens on the CPU and is affected by the GIL.
+    lxml builds the document tree and runs each XPath query in C with
+    the GIL released, so the loop below only holds it for a few
+    attribute lookups per story. With free-threaded Python, multiple
+    threads can run that part simultaneously too.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    comments = []
+    # lxml refuses to build a tree from an empty page; there are no stories
+    if not html.strip():
+        return []
+    doc = lxml.html.document_fromstring(html, parser=parsers.html)
+    stories = (story_from_row(row) for row in parsers.story_rows(doc))
+    return [story for story in stories if story is not None]
 
-    for row in soup.select("tr.comtr"):
-        user_tag = row.select_one(".hnuser")
-        comment_tag = row.select_one(".commtext")
 
-        if user_tag and comment_tag:
-            user = user_tag.text.strip()
-            text = comment_tag.get_text(separator=" ", strip=True)
-            comments.append({"user": user, "text": text})
+def parse_comments(html: bytes) -> list[Comment]:
+    """Extract comments from a Hacker News story page.
 
-    return comments
+    Like parse_stories, this CPU-bound parsing benefits from
+    true parallelism in free-threaded Python.
+    """
+    if not html.strip():
+        return []
+    doc = lxml.html.document_fromstring(html, parser=parsers.html)
+    comments = (comment_from_row(row) for row in parsers.comment_rows(doc))
+    return [comment for comment in comments if comment is not None]
+
+
+async def fetch_rows(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    parse_row: Callable[[etree._Element], Story | Comment | None],
+) -> list[Story | Comment]:
+    """Fetch a page and parse its table rows while it is still downloading.
+
+    Instead of waiting for the whole page and then parsing it, each chunk
+    goes into lxml's pull parser as soon as it arrives, and every finished
+    <tr> is handed to parse_row right away. Parsing overlaps the download.
+    Once a row has been turned into a story or comment, it is cleared and
+    the rows before it are deleted, so the parsed page never piles up in
+    memory.
+    """
+    results = []
+    parser = etree.HTMLPullParser(events=("end",), tag="tr", encoding="utf-8")
+    received_any = False
+
+    def take_rows() -> None:
+        for _, row in parser.read_events():
+            item = parse_row(row)
+            if item is not None:
+                results.append(item)
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+
+    async with semaphore, session.get(url) as response:
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            received_any = True
+            parser.feed(chunk)
+            take_rows()
+    # lxml won't close a parser that was never fed, and an empty page
+    # simply has no rows
+    if not received_any:
+        return results
+    parser.close()
+    take_rows()
+    return results
+
+
+def gil_enabled() -> bool:
+    """Check whether this interpreter is running with the GIL."""
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def create_parse_pool(workers: int) -> Executor:
+    """Create a pool that can parse pages on several cores at once.
+
+    Without the GIL, plain threads already parse in parallel. With it,
+    each parser needs its own process. Python 3.14's sub-interpreters
+    (InterpreterPoolExecutor) would be lighter than processes, but lxml
+    can't be imported inside a sub-interpreter, so they aren't an option.
+    """
+    if gil_enabled():
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+async def fetch_parsed(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    parse_row: Callable[[etree._Element], Story | Comment | None],
+    parse_page: Callable[[bytes], list[Story] | list[Comment]],
+    parse_pool: Executor | None = None,
+) -> list[Story | Comment]:
+    """Fetch and parse a page, either here or in the parse pool.
+
+    Without a pool we parse rows as they stream in. With one, we download
+    the whole page and hand it to another core to parse, which keeps the
+    event loop free to start more downloads.
+    """
+    if parse_pool is None:
+        return await fetch_rows(session, semaphore, url, parse_row)
+    html = await fetch(session, semaphore, url)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(parse_pool, parse_page, html)
 
 
 async def fetch_story_with_comments(
-    session: aiohttp.ClientSession, story: dict
-) -> dict:
-    """Fetch a story's comment page and add comments to the story dict.
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    story: Story,
+    all_stories: list,
+    parse_pool: Executor | None = None,
+) -> None:
+    """Fetch a story's comment page and add the finished story to the list.
 
     This demonstrates the callback nature of web scraping:
     - We fetch a page (the main story list)
     - That page has links to other pages (individual stories)
     - We follow those links and fetch more data
     """
-    comment_html = await fetch(session, ITEM_URL.format(story["id"]))
-    story["comments"] = parse_comments(comment_html)
-    return story
-
-
-async def worker(queue: Queue, all_stories: list) -> None:
-    """Worker coroutine that processes pages from a shared queue.
-
-    Each worker:
-    1. Gets a page URL from the queue
+    comments = await fetch_parsed(
+        session,
+        semaphore,
+        ITEM_URL.format(story.id),
+        comment_from_row,
+        parse_comments,
+        parse_pool,
+    )
+    all_stories.append(story._replace(comments=comments))
+
+
+async def scrape_pages(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    tg: asyncio.TaskGroup,
+    pages: Iterator[str],
+    all_stories: list,
+    parse_pool: Executor | None = None,
+) -> None:
+    """Keep taking pages from this worker's list until it runs dry.
+
+    Comment fetches are handed to the TaskGroup instead of being awaited
+    here, so the next page download starts right away while the previous
+    page's comments are still coming in. Each story is added to
+    all_stories once its comments are in.
+    """
+    for page in pages:
+        stories = await fetch_parsed(
+            session, semaphore, page, story_from_row, parse_stories, parse_pool
+        )
+        if not stories:
+            return
+        # Create concurrent tasks to fetch all story comments
+        for story in stories:
+            tg.create_task(
+                fetch_story_with_comments(
+                    session, semaphore, story, all_stories, parse_pool
+                )
+            )
+
+
+async def worker(
+    session: aiohttp.ClientSession,
+    pages: list[str],
+    all_stories: list,
+    parse_pool: Executor | None = None,
+) -> None:
+    """Worker coroutine that processes its own share of the pages.
+
+    Each worker runs a few page loops side by side, all pulling from the
+    same iterator over this worker's pages. Each loop:
+    1. Gets the next page URL
     2. Fetches the page
     3. Parses the stories on that page
     4. For each story, creates a task to fetch its comments
-    5. Adds all stories to the shared list
+    5. Adds the stories to the shared list and moves on to the next page
 
-    The TaskGroup ensures all comment fetches complete before moving on.
+    The TaskGroup ensures all comment fetches complete before the worker
+    returns. If a parse pool is given, parsing happens there instead of
+    on this thread.
     """
-    async with aiohttp.ClientSession() as session:
-        while True:
-            async with asyncio.TaskGroup() as tg:
-                try:
-                    page = queue.get(block=False)
-                except Empty:
-                    break
-                html = await fetch(session, page)
-                stories = parse_stories(html)
-                if not stories:
-                    break
-                # Create concurrent tasks to fetch all story comments
-                for story in stories:
-                    tg.create_task(fetch_story_with_comments(session, story))
-            all_stories.extend(stories)
-
-
-def main(multithreaded: bool) -> None:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    remaining = iter(pages)
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(PAGES_IN_FLIGHT):
+            tg.create_task(
+                scrape_pages(
+                    session, semaphore, tg, remaining, all_stories, parse_pool
+                )
+            )
+
+
+async def scrape(
+    pages: list[str], all_stories: list, parse_pool: Executor | None = None
+) -> None:
+    """Run a worker on this thread's event loop with a single shared session."""
+    async with create_session() as session:
+        await worker(session, pages, all_stories, parse_pool)
+
+
+def main(multithreaded: bool, use_parse_pool: bool = False) -> None:
     """Main orchestration function.
 
     When multithreaded=False:
@@ -131,26 +378,40 @@ def main(multithreaded: bool) -> None:
         Without GIL (python -X gil=0):
             True parallelism! All CPU cores can work simultaneously on both
             I/O and CPU-bound work. Maximum performance.
+
+    When use_parse_pool=True:
+        Runs one asyncio event loop for all the downloading, and sends
+        each page to a pool to be parsed. The pool uses threads without
+        the GIL and processes with it, so parsing uses every core on
+        either build.
     """
-    queue = Queue()
     all_stories = []
 
-    # Add 100 pages to scrape
-    for page in range(1, 101):
-        queue.put(BASE_URL.format(page))
+    # Build the list of 100 pages to scrape
+    pages = [BASE_URL.format(page) for page in range(1, 101)]
 
     start_time = perf_counter()
 
-    if multithreaded:
+    workers: int = 8  # Number of CPU cores to use
+
+    if use_parse_pool:
+        print("Using one event loop plus a parse pool for stories...")
+        with create_parse_pool(workers) as pool:
+            asyncio.run(scrape(pages, all_stories, pool), loop_factory=loop_factory)
+    elif multithreaded:
         print("Using multithreading for fetching stories...")
-        workers: int = 8  # Number of CPU cores to use
+        # Deal the pages out round-robin up front, so threads never
+        # have to coordinate (or take a lock) to find their next page
+        chunks = [pages[i::workers] for i in range(workers)]
         with ThreadPoolExecutor(max_workers=workers) as executor:
             # Each thread runs its own asyncio event loop
-            for _ in range(workers):
-                executor.submit(lambda: asyncio.run(worker(queue, all_stories)))
+            for chunk in chunks:
+                executor.submit(
+                    asyncio.run, scrape(chunk, all_stories), loop_factory=loop_factory
+                )
     else:
         print("Using single thread for fetching stories...")
-        asyncio.run(worker(queue, all_stories))
+        asyncio.run(scrape(pages, all_stories), loop_factory=loop_factory)
 
     end_time = perf_counter()
     elapsed = end_time - start_time
@@ -165,11 +426,18 @@ def main(multithreaded: bool) -> None:
 
 if __name__ == "__main__":
     parser = ArgumentParser(description="Scrape Hacker News stories and comments.")
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
         "--multithreaded",
         action="store_true",
         default=False,
         help="Use multithreading for fetching stories.",
     )
+    mode.add_argument(
+        "--parse-pool",
+        action="store_true",
+        default=False,
+        help="Fetch on one event loop and parse pages in a worker pool.",
+    )
     args = parser.parse_args()
-    main(args.multithreaded)
+    main(args.multithreaded, use_parse_pool=args.parse_pool)